@@ -0,0 +1,61 @@
+# cython: language_level=3, boundscheck=False, wraparound=False
+"""
+sei_parser.py的可选C加速模块
+编译: cythonize -i _sei_c.pyx
+未编译时sei_parser.py自动使用纯Python实现
+"""
+
+cdef extern from *:
+    """
+    #if defined(__GNUC__) || defined(__clang__)
+    #define SEI_UNLIKELY(x) __builtin_expect(!!(x), 0)
+    #else
+    #define SEI_UNLIKELY(x) (x)
+    #endif
+    """
+    bint SEI_UNLIKELY(bint x) nogil
+
+
+def scan_sei(nalu_data, Py_ssize_t offset):
+    """扫描SEI NALU中的所有payload头，返回 (sei_type, sei_size, payload偏移) 列表
+
+    与sei_parser._scan_sei行为一致。
+    """
+    cdef const unsigned char[:] buf = nalu_data
+    cdef Py_ssize_t data_len = buf.shape[0]
+    cdef Py_ssize_t sei_type, sei_size
+    payloads = []
+
+    while offset < data_len:
+        # 解析SEI payload type，大多数type小于255，0xFF扩展字节很少出现
+        sei_type = 0
+        while offset < data_len and SEI_UNLIKELY(buf[offset] == 0xFF):
+            sei_type += 255
+            offset += 1
+
+        if offset >= data_len:
+            break
+
+        sei_type += buf[offset]
+        offset += 1
+
+        # 解析SEI payload size
+        sei_size = 0
+        while offset < data_len and SEI_UNLIKELY(buf[offset] == 0xFF):
+            sei_size += 255
+            offset += 1
+
+        if offset >= data_len:
+            break
+
+        sei_size += buf[offset]
+        offset += 1
+
+        # payload超出NALU范围时截断
+        if offset + sei_size > data_len:
+            sei_size = data_len - offset
+
+        payloads.append((sei_type, sei_size, offset))
+        offset += sei_size
+
+    return payloads
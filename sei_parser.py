@@ -8,114 +8,346 @@ import struct
 import sys
 import os
 import json
-from typing import List, Tuple, Optional, Dict, Any
+import mmap
+import re
+import stat
+from typing import Iterator, List, Tuple, Optional, Dict, Any
+
+
+# 预编译的大端整数解码器，避免每次调用都解析格式字符串
+_U32 = struct.Struct('>I').unpack_from
+_U64 = struct.Struct('>Q').unpack_from
+# MP4 box头: 32位size + 4字节type
+_BOX_HDR = struct.Struct('>I4s').unpack_from
+# 匹配连续的0xFF字节
+_FF_RUN = re.compile(b'\xff*').match
+# FLV tag头: TagType, DataSize(24位), Timestamp(24位), TimestampExtended, StreamID(24位)
+_TAG_HDR = struct.Struct('>B3s3sB3s').unpack_from
+
+
+# SEI NALU的第一个字节: H.264为nal_ref_idc=0、nal_unit_type=6；
+# H.265为nal_unit_type=39/40，最低位是nuh_layer_id的最高位
+_H264_SEI_HEADERS = b'\x06'
+_H265_SEI_HEADERS = b'\x4e\x4f\x50\x51'
+
+
+def _find_sei_nalus(data: bytes, nalu_headers: bytes,
+                    start: int = 0, end: Optional[int] = None) -> List[Tuple[int, int]]:
+    """在[start, end)范围内查找以指定NALU头字节开始的NALU，返回 (NALU起始位置, NALU结束位置) 列表
+    
+    直接搜索 起始码 + NALU头 的组合，只有命中时才去找该NALU的结束位置，
+    其余NALU不会被逐个切片检查。
+    """
+    if end is None:
+        end = len(data)
+    
+    nalus = []
+    patterns = [b'\x00\x00\x01' + bytes([header]) for header in nalu_headers]
+    next_pos = [data.find(pattern, start, end) for pattern in patterns]
+    
+    while True:
+        candidates = [pos for pos in next_pos if pos != -1]
+        if not candidates:
+            break
+        
+        nalu_start = min(candidates) + 3
+        
+        # NALU在下一个起始码处结束，4字节起始码的前导0x00不属于本NALU
+        nalu_end = data.find(b'\x00\x00\x01', nalu_start, end)
+        if nalu_end == -1:
+            nalu_end = end
+        elif data[nalu_end-1] == 0:
+            nalu_end -= 1
+        
+        nalus.append((nalu_start, nalu_end))
+        
+        for i, pos in enumerate(next_pos):
+            if pos != -1 and pos < nalu_end:
+                next_pos[i] = data.find(patterns[i], nalu_end, end)
+    
+    return nalus
+
+
+def _map_file(f) -> bytes:
+    """普通文件用mmap按需映射，避免把整个文件读入内存；
+    空文件以及管道、FIFO等无法mmap的输入退回到一次性读取
+    """
+    st = os.fstat(f.fileno())
+    if stat.S_ISREG(st.st_mode) and st.st_size > 0:
+        try:
+            return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            pass
+    return f.read()
+
+
+def _iter_flv_video_tags(data: bytes) -> Iterator[Tuple[int, int]]:
+    """扫描FLV tag头，逐个产出视频tag数据的 (起始位置, 长度)"""
+    offset = 9  # 跳过FLV头
+    offset += 4  # 跳过第一个previous tag size
+    
+    while offset + 11 <= len(data):
+        # 读取FLV tag头
+        tag_type, data_size, _, _, _ = _TAG_HDR(data, offset)
+        data_size = int.from_bytes(data_size, 'big')
+        
+        offset += 11
+        
+        if offset + data_size > len(data):
+            break
+        
+        # 只产出视频tag (type = 9)
+        if tag_type == 9 and data_size > 0:
+            yield offset, data_size
+        
+        offset += data_size + 4  # 数据 + previous tag size
+
+
+def _rbsp_unescape(nalu_data: bytes) -> bytes:
+    """去除NALU中的防竞争字节，将 0x000003 还原为 0x0000
+    
+    bytes.replace从左到右不重叠地匹配，与逐字节去除0x03的结果一致。
+    """
+    return bytes(nalu_data).replace(b'\x00\x00\x03', b'\x00\x00')
+
+
+def _scan_sei(nalu_data: bytes, offset: int) -> List[Tuple[int, int, int]]:
+    """扫描SEI NALU中的所有payload头，返回 (sei_type, sei_size, payload偏移) 列表
+    
+    逐字节的type/size变长解码集中在这一个紧凑循环里，UTF-8/JSON等解码留给调用方。
+    """
+    payloads = []
+    data_len = len(nalu_data)
+    
+    while offset < data_len:
+        # 解析SEI payload type，0xFF扩展字节的长度由正则一次匹配得到
+        sei_type = 0
+        if nalu_data[offset] == 0xFF:
+            ff_end = _FF_RUN(nalu_data, offset).end()
+            sei_type = 255 * (ff_end - offset)
+            offset = ff_end
+        
+        if offset >= data_len:
+            break
+        
+        sei_type += nalu_data[offset]
+        offset += 1
+        
+        # 解析SEI payload size
+        sei_size = 0
+        if offset < data_len and nalu_data[offset] == 0xFF:
+            ff_end = _FF_RUN(nalu_data, offset).end()
+            sei_size = 255 * (ff_end - offset)
+            offset = ff_end
+        
+        if offset >= data_len:
+            break
+        
+        sei_size += nalu_data[offset]
+        offset += 1
+        
+        # payload超出NALU范围时截断
+        if offset + sei_size > data_len:
+            sei_size = data_len - offset
+        
+        payloads.append((sei_type, sei_size, offset))
+        offset += sei_size
+    
+    return payloads
+
+
+try:
+    # 可选的C加速实现，见_sei_c.pyx；未编译时使用上面的纯Python实现
+    from _sei_c import scan_sei as _scan_sei
+except ImportError:
+    pass
+
+
+def _iter_boxes(data: bytes, offset: int, end: int):
+    """遍历[offset, end)范围内的MP4 box，产出 (box类型, box数据起始位置, box结束位置)"""
+    while offset + 8 <= end:
+        box_size, box_type = _BOX_HDR(data, offset)
+        header_size = 8
+        
+        if box_size == 0:
+            # box一直延续到末尾
+            box_size = end - offset
+        elif box_size == 1:
+            # 64位largesize
+            if offset + 16 > end:
+                break
+            box_size = _U64(data, offset + 8)[0]
+            header_size = 16
+        
+        if box_size < header_size:
+            break
+        
+        yield box_type, offset + header_size, min(offset + box_size, end)
+        offset += box_size
+
+
+def _find_boxes(data: bytes, path: List[bytes], offset: int, end: int):
+    """按box类型路径查找嵌套的MP4 box，产出 (box数据起始位置, box结束位置)"""
+    for box_type, box_data_start, box_end in _iter_boxes(data, offset, end):
+        if box_type != path[0]:
+            continue
+        if len(path) == 1:
+            yield box_data_start, box_end
+        else:
+            yield from _find_boxes(data, path[1:], box_data_start, box_end)
+
+
+# 每次解析最多缓存的不同payload数量
+_DECODE_CACHE_SIZE = 1024
+
+
+# SEI payload类型名称
+_SEI_TYPE_NAMES = {
+    0: "buffering_period",
+    1: "pic_timing",
+    2: "pan_scan_rect",
+    3: "filler_payload",
+    4: "user_data_registered_itu_t_t35",
+    5: "user_data_unregistered",
+    6: "recovery_point",
+    7: "dec_ref_pic_marking_repetition",
+    8: "spare_pic",
+    9: "scene_info",
+    10: "sub_seq_info",
+    11: "sub_seq_layer_characteristics",
+    12: "sub_seq_characteristics",
+    13: "full_frame_freeze",
+    14: "full_frame_freeze_release",
+    15: "full_frame_snapshot",
+    16: "progressive_refinement_segment_start",
+    17: "progressive_refinement_segment_end",
+    18: "motion_constrained_slice_group_set",
+    19: "film_grain_characteristics",
+    20: "deblocking_filter_display_preference",
+    21: "stereo_video_info",
+    22: "post_filter_hint",
+    23: "tone_mapping_info",
+    24: "scalability_info",
+    25: "sub_pic_scalable_layer",
+    26: "non_required_layer_rep",
+    27: "priority_layer_info",
+    28: "layers_not_present",
+    29: "layer_dependency_change",
+    30: "scalable_nesting",
+    31: "base_layer_temporal_hrd",
+    32: "quality_layer_integrity_check",
+    33: "redundant_pic_property",
+    34: "tl0_dep_rep_index",
+    35: "tl_switching_point",
+    36: "parallel_decoding_info",
+    37: "mvc_scalable_nesting",
+    38: "view_scalability_info",
+    39: "multiview_scene_info",
+    40: "multiview_acquisition_info",
+    41: "non_required_view_component",
+    42: "view_dependency_change",
+    43: "operation_points_not_present",
+    44: "base_view_temporal_hrd",
+    45: "frame_packing_arrangement",
+    46: "multiview_view_position",
+    47: "display_orientation",
+    48: "mvcd_scalable_nesting",
+    49: "mvcd_view_scalability_info",
+    50: "depth_representation_info",
+    51: "three_dimensional_reference_displays_info",
+    52: "depth_timing",
+    53: "depth_sampling_info",
+    54: "constrained_depth_parameter_set_identifier",
+    # H.265 specific
+    128: "active_parameter_sets",
+    129: "decoding_unit_info",
+    130: "temporal_sub_layer_zero_index",
+    131: "decoded_picture_hash",
+    132: "scalable_nesting",
+    133: "region_refresh_info",
+    134: "no_display",
+    135: "time_code",
+    136: "mastering_display_colour_volume",
+    137: "segmented_rect_frame_packing_arrangement",
+    138: "temporal_motion_constrained_tile_sets",
+    139: "chroma_resampling_filter_hint",
+    140: "knee_function_info",
+    141: "colour_remapping_info",
+    142: "deinterlaced_field_identification",
+    143: "content_light_level_info",
+    144: "dependent_rap_indication",
+    145: "coded_region_completion",
+    146: "alternative_transfer_characteristics",
+    147: "ambient_viewing_environment",
+    148: "content_colour_volume",
+    149: "equirectangular_projection",
+    150: "cubemap_projection",
+    151: "fisheye_video_info",
+    152: "sphere_rotation",
+    153: "regionwise_packing",
+    154: "omni_viewport",
+    155: "regional_nesting",
+    156: "mcts_extraction_info_sets",
+    157: "mcts_extraction_info_nesting",
+    158: "layers_not_present",
+    159: "inter_layer_constrained_tile_sets",
+    160: "bsp_nesting",
+    161: "bsp_initial_arrival_time",
+    162: "sub_bitstream_property",
+    163: "alpha_channel_info",
+    164: "overlay_info",
+    165: "temporal_mv_prediction_constraints",
+    166: "frame_field_info",
+    167: "three_dimensional_reference_displays_info",
+    168: "depth_representation_info_sei",
+    169: "multiview_scene_info",
+    170: "multiview_acquisition_info",
+    171: "multiview_view_position",
+    172: "alternative_depth_info",
+}
+
+# 按类型编号直接索引的名称表，未定义的编号为None，查询时无需哈希
+_SEI_TYPES: Tuple[Optional[str], ...] = tuple(
+    _SEI_TYPE_NAMES.get(sei_type) for sei_type in range(max(_SEI_TYPE_NAMES) + 1)
+)
+
+
+def _sei_type_name(sei_type: int) -> str:
+    """返回SEI payload类型名称"""
+    if sei_type < len(_SEI_TYPES) and _SEI_TYPES[sei_type]:
+        return _SEI_TYPES[sei_type]
+    return f'unknown_{sei_type}'
+
+
+class SEIInfo(dict):
+    """单个SEI payload的解析结果，payload_hex在首次访问时才由payload_bytes计算
+    
+    sei['payload_hex']、sei.get('payload_hex')和'payload_hex' in sei都会得到该字段；
+    在首次访问之前，遍历、dict(sei)和{**sei}中不包含payload_hex。
+    """
+    
+    def __missing__(self, key):
+        if key == 'payload_hex':
+            value = self['payload_bytes'].hex()
+            self[key] = value
+            return value
+        raise KeyError(key)
+    
+    def __contains__(self, key):
+        return key == 'payload_hex' or super().__contains__(key)
+    
+    def get(self, key, default=None):
+        if key in self:
+            return self[key]
+        return default
 
 
 class SEIParser:
-    def __init__(self):
-        self.sei_types = {
-            0: "buffering_period",
-            1: "pic_timing",
-            2: "pan_scan_rect",
-            3: "filler_payload",
-            4: "user_data_registered_itu_t_t35",
-            5: "user_data_unregistered",
-            6: "recovery_point",
-            7: "dec_ref_pic_marking_repetition",
-            8: "spare_pic",
-            9: "scene_info",
-            10: "sub_seq_info",
-            11: "sub_seq_layer_characteristics",
-            12: "sub_seq_characteristics",
-            13: "full_frame_freeze",
-            14: "full_frame_freeze_release",
-            15: "full_frame_snapshot",
-            16: "progressive_refinement_segment_start",
-            17: "progressive_refinement_segment_end",
-            18: "motion_constrained_slice_group_set",
-            19: "film_grain_characteristics",
-            20: "deblocking_filter_display_preference",
-            21: "stereo_video_info",
-            22: "post_filter_hint",
-            23: "tone_mapping_info",
-            24: "scalability_info",
-            25: "sub_pic_scalable_layer",
-            26: "non_required_layer_rep",
-            27: "priority_layer_info",
-            28: "layers_not_present",
-            29: "layer_dependency_change",
-            30: "scalable_nesting",
-            31: "base_layer_temporal_hrd",
-            32: "quality_layer_integrity_check",
-            33: "redundant_pic_property",
-            34: "tl0_dep_rep_index",
-            35: "tl_switching_point",
-            36: "parallel_decoding_info",
-            37: "mvc_scalable_nesting",
-            38: "view_scalability_info",
-            39: "multiview_scene_info",
-            40: "multiview_acquisition_info",
-            41: "non_required_view_component",
-            42: "view_dependency_change",
-            43: "operation_points_not_present",
-            44: "base_view_temporal_hrd",
-            45: "frame_packing_arrangement",
-            46: "multiview_view_position",
-            47: "display_orientation",
-            48: "mvcd_scalable_nesting",
-            49: "mvcd_view_scalability_info",
-            50: "depth_representation_info",
-            51: "three_dimensional_reference_displays_info",
-            52: "depth_timing",
-            53: "depth_sampling_info",
-            54: "constrained_depth_parameter_set_identifier",
-            # H.265 specific
-            128: "active_parameter_sets",
-            129: "decoding_unit_info",
-            130: "temporal_sub_layer_zero_index",
-            131: "decoded_picture_hash",
-            132: "scalable_nesting",
-            133: "region_refresh_info",
-            134: "no_display",
-            135: "time_code",
-            136: "mastering_display_colour_volume",
-            137: "segmented_rect_frame_packing_arrangement",
-            138: "temporal_motion_constrained_tile_sets",
-            139: "chroma_resampling_filter_hint",
-            140: "knee_function_info",
-            141: "colour_remapping_info",
-            142: "deinterlaced_field_identification",
-            143: "content_light_level_info",
-            144: "dependent_rap_indication",
-            145: "coded_region_completion",
-            146: "alternative_transfer_characteristics",
-            147: "ambient_viewing_environment",
-            148: "content_colour_volume",
-            149: "equirectangular_projection",
-            150: "cubemap_projection",
-            151: "fisheye_video_info",
-            152: "sphere_rotation",
-            153: "regionwise_packing",
-            154: "omni_viewport",
-            155: "regional_nesting",
-            156: "mcts_extraction_info_sets",
-            157: "mcts_extraction_info_nesting",
-            158: "layers_not_present",
-            159: "inter_layer_constrained_tile_sets",
-            160: "bsp_nesting",
-            161: "bsp_initial_arrival_time",
-            162: "sub_bitstream_property",
-            163: "alpha_channel_info",
-            164: "overlay_info",
-            165: "temporal_mv_prediction_constraints",
-            166: "frame_field_info",
-            167: "three_dimensional_reference_displays_info",
-            168: "depth_representation_info_sei",
-            169: "multiview_scene_info",
-            170: "multiview_acquisition_info",
-            171: "multiview_view_position",
-            172: "alternative_depth_info",
-        }
+    def __init__(self, decode: bool = True):
+        # decode为False时只枚举SEI的类型和大小，跳过字符串/JSON解码
+        self.decode = decode
+        # payload -> (payload_string, 是否为JSON)，只在一次解析内有效
+        self._decode_cache: Dict[bytes, Tuple[Optional[str], bool]] = {}
     
     def parse_file(self, filepath: str) -> List[Dict[str, Any]]:
         """解析文件中的SEI数据"""
@@ -125,19 +357,34 @@ class SEIParser:
         file_ext = os.path.splitext(filepath)[1].lower()
         
         with open(filepath, 'rb') as f:
-            data = f.read()
-        
-        if file_ext == '.flv':
-            return self._parse_flv(data)
-        elif file_ext == '.mp4':
-            return self._parse_mp4(data)
-        elif file_ext in ['.h264', '.264']:
-            return self._parse_h264_stream(data)
-        elif file_ext in ['.h265', '.265', '.hevc']:
-            return self._parse_h265_stream(data)
-        else:
-            # 尝试自动检测
-            return self._auto_detect_and_parse(data)
+            data = _map_file(f)
+            try:
+                return self._parse_data(data, file_ext)
+            finally:
+                if isinstance(data, mmap.mmap):
+                    try:
+                        data.close()
+                    except BufferError:
+                        # 解析出错时异常栈里仍有引用映射的memoryview，留给垃圾回收关闭
+                        pass
+    
+    def _parse_data(self, data: bytes, file_ext: str) -> List[Dict[str, Any]]:
+        """根据文件扩展名选择解析方法"""
+        try:
+            if file_ext == '.flv':
+                return self._parse_flv(data)
+            elif file_ext == '.mp4':
+                return self._parse_mp4(data)
+            elif file_ext in ['.h264', '.264']:
+                return self._parse_h264_stream(data)
+            elif file_ext in ['.h265', '.265', '.hevc']:
+                return self._parse_h265_stream(data)
+            else:
+                # 尝试自动检测
+                return self._auto_detect_and_parse(data)
+        finally:
+            # 解析结束后释放payload解码缓存
+            self._decode_cache.clear()
     
     def _parse_flv(self, data: bytes) -> List[Dict[str, Any]]:
         """解析FLV文件"""
@@ -147,33 +394,13 @@ class SEIParser:
         if len(data) < 9 or data[:3] != b'FLV':
             raise ValueError("不是有效的FLV文件")
         
-        offset = 9  # 跳过FLV头
-        offset += 4  # 跳过第一个previous tag size
+        # 通过memoryview切片，避免每个tag都复制数据
+        mv = memoryview(data)
         
-        while offset < len(data):
-            if offset + 11 > len(data):
-                break
-                
-            # 读取FLV tag头
-            tag_type = data[offset]
-            data_size = struct.unpack('>I', b'\x00' + data[offset+1:offset+4])[0]
-            timestamp = struct.unpack('>I', b'\x00' + data[offset+4:offset+7])[0]
-            timestamp_ext = data[offset+7]
-            stream_id = struct.unpack('>I', b'\x00' + data[offset+8:offset+11])[0]
-            
-            offset += 11
-            
-            if offset + data_size > len(data):
-                break
-            
-            # 只处理视频tag (type = 9)
-            if tag_type == 9:
-                video_data = data[offset:offset+data_size]
-                if len(video_data) > 0:
-                    sei_data = self._extract_sei_from_video_data(video_data)
-                    sei_list.extend(sei_data)
-            
-            offset += data_size + 4  # 数据 + previous tag size
+        # 逐个视频tag提取SEI，各tag之间互不依赖
+        for tag_offset, tag_size in _iter_flv_video_tags(mv):
+            video_data = mv[tag_offset:tag_offset+tag_size]
+            sei_list.extend(self._extract_sei_from_video_data(video_data))
         
         return sei_list
     
@@ -194,7 +421,7 @@ class SEIParser:
                 return sei_list
                 
             avc_packet_type = video_data[1]
-            composition_time = struct.unpack('>I', b'\x00' + video_data[2:5])[0]
+            composition_time = int.from_bytes(video_data[2:5], 'big')
             
             if avc_packet_type == 0:  # AVC sequence header
                 # 解析AVC decoder configuration record
@@ -205,18 +432,21 @@ class SEIParser:
         
         return sei_list
     
-    def _parse_h264_nalus(self, data: bytes) -> List[Dict[str, Any]]:
-        """解析H.264 NALU数据"""
+    def _parse_h264_nalus(self, data: bytes, length_size: int = 4) -> List[Dict[str, Any]]:
+        """解析H.264 NALU数据，length_size为NALU长度字段的字节数 (1、2或4)"""
         sei_list = []
         offset = 0
         
         while offset < len(data):
-            if offset + 4 > len(data):
+            if offset + length_size > len(data):
                 break
             
             # 读取NALU长度 (网络字节序)
-            nalu_length = struct.unpack('>I', data[offset:offset+4])[0]
-            offset += 4
+            if length_size == 4:
+                nalu_length = _U32(data, offset)[0]
+            else:
+                nalu_length = int.from_bytes(data[offset:offset+length_size], 'big')
+            offset += length_size
             
             if offset + nalu_length > len(data):
                 break
@@ -234,93 +464,63 @@ class SEIParser:
         
         return sei_list
     
-    def _parse_h264_stream(self, data: bytes) -> List[Dict[str, Any]]:
-        """解析H.264裸流"""
+    def _parse_h265_nalus(self, data: bytes, length_size: int = 4) -> List[Dict[str, Any]]:
+        """解析H.265 NALU数据，length_size为NALU长度字段的字节数 (1、2或4)"""
         sei_list = []
-        
-        # 查找起始码 0x000001 或 0x00000001
-        start_codes = [b'\x00\x00\x01', b'\x00\x00\x00\x01']
         offset = 0
         
         while offset < len(data):
-            # 查找下一个起始码
-            next_start = len(data)
-            start_code_len = 0
-            
-            for sc in start_codes:
-                pos = data.find(sc, offset)
-                if pos != -1 and pos < next_start:
-                    next_start = pos
-                    start_code_len = len(sc)
-            
-            if next_start == len(data):
+            if offset + length_size > len(data):
                 break
             
-            # 查找这个NALU的结束位置
-            nalu_start = next_start + start_code_len
-            nalu_end = len(data)
+            # 读取NALU长度 (网络字节序)
+            if length_size == 4:
+                nalu_length = _U32(data, offset)[0]
+            else:
+                nalu_length = int.from_bytes(data[offset:offset+length_size], 'big')
+            offset += length_size
             
-            for sc in start_codes:
-                pos = data.find(sc, nalu_start)
-                if pos != -1 and pos < nalu_end:
-                    nalu_end = pos
+            if offset + nalu_length > len(data):
+                break
             
-            if nalu_start < nalu_end:
-                nalu_data = data[nalu_start:nalu_end]
-                if len(nalu_data) > 0:
-                    nalu_type = nalu_data[0] & 0x1F
-                    
-                    # SEI NALU type = 6
-                    if nalu_type == 6:
-                        sei_payloads = self._parse_sei_nalu(nalu_data)
-                        sei_list.extend(sei_payloads)
+            nalu_data = data[offset:offset+nalu_length]
+            if len(nalu_data) >= 2:
+                nalu_type = (nalu_data[0] >> 1) & 0x3F
+                
+                # H.265 SEI NALU types: 39 (PREFIX_SEI) and 40 (SUFFIX_SEI)
+                if nalu_type in [39, 40]:
+                    sei_payloads = self._parse_sei_nalu(nalu_data, is_h265=True)
+                    sei_list.extend(sei_payloads)
             
-            offset = next_start + start_code_len
+            offset += nalu_length
         
         return sei_list
     
-    def _parse_h265_stream(self, data: bytes) -> List[Dict[str, Any]]:
-        """解析H.265裸流"""
+    def _parse_h264_stream(self, data: bytes) -> List[Dict[str, Any]]:
+        """解析H.264裸流"""
         sei_list = []
+        mv = memoryview(data)
         
-        # 查找起始码
-        start_codes = [b'\x00\x00\x01', b'\x00\x00\x00\x01']
-        offset = 0
+        # 直接搜索SEI NALU (起始码 + NALU头0x06)，跳过其他NALU
+        for nalu_start, nalu_end in _find_sei_nalus(data, _H264_SEI_HEADERS):
+            nalu_data = mv[nalu_start:nalu_end]
+            sei_payloads = self._parse_sei_nalu(nalu_data)
+            sei_list.extend(sei_payloads)
         
-        while offset < len(data):
-            # 查找下一个起始码
-            next_start = len(data)
-            start_code_len = 0
-            
-            for sc in start_codes:
-                pos = data.find(sc, offset)
-                if pos != -1 and pos < next_start:
-                    next_start = pos
-                    start_code_len = len(sc)
-            
-            if next_start == len(data):
-                break
-            
-            # 查找这个NALU的结束位置
-            nalu_start = next_start + start_code_len
-            nalu_end = len(data)
-            
-            for sc in start_codes:
-                pos = data.find(sc, nalu_start)
-                if pos != -1 and pos < nalu_end:
-                    nalu_end = pos
-            
-            if nalu_start < nalu_end:
-                nalu_data = data[nalu_start:nalu_end]
-                if len(nalu_data) >= 2:
-                    nalu_type = (nalu_data[0] >> 1) & 0x3F
-                    
-                    # H.265 SEI NALU types: 39 (PREFIX_SEI) and 40 (SUFFIX_SEI)
-                    if nalu_type in [39, 40]:
-                        sei_payloads = self._parse_sei_nalu(nalu_data, is_h265=True)
-                        sei_list.extend(sei_payloads)
-            
-            offset = next_start + start_code_len
+        return sei_list
+    
+    def _parse_h265_stream(self, data: bytes,
+                           start: int = 0, end: Optional[int] = None) -> List[Dict[str, Any]]:
+        """解析H.265裸流，可只解析data中[start, end)范围内的数据"""
+        sei_list = []
+        mv = memoryview(data)
+        
+        # 直接搜索PREFIX_SEI (39) 和 SUFFIX_SEI (40) NALU，跳过其他NALU
+        for nalu_start, nalu_end in _find_sei_nalus(data, _H265_SEI_HEADERS, start, end):
+            if nalu_end - nalu_start >= 2:
+                nalu_data = mv[nalu_start:nalu_end]
+                sei_payloads = self._parse_sei_nalu(nalu_data, is_h265=True)
+                sei_list.extend(sei_payloads)
         
         return sei_list
     
@@ -328,40 +528,60 @@ class SEIParser:
         """解析MP4文件"""
         # 简化的MP4解析，主要查找mdat box中的视频数据
         sei_list = []
-        offset = 0
+        mv = memoryview(data)
+        
+        # 先从stsd中确定视频编码和NALU长度字段的字节数
+        codec_info = self._parse_stsd(data)
         
-        while offset < len(data) - 8:
-            box_size = struct.unpack('>I', data[offset:offset+4])[0]
-            box_type = data[offset+4:offset+8]
+        for box_type, box_data_start, box_end in _iter_boxes(data, 0, len(data)):
+            if box_type != b'mdat':
+                continue
             
-            if box_size == 0:
-                box_size = len(data) - offset
-            elif box_size == 1:
-                if offset + 16 > len(data):
-                    break
-                box_size = struct.unpack('>Q', data[offset+8:offset+16])[0]
-                box_data_start = offset + 16
-            else:
-                box_data_start = offset + 8
+            mdat_data = mv[box_data_start:box_end]
             
-            if box_type == b'mdat':
-                # 在mdat中查找H.264/H.265数据
-                mdat_data = data[box_data_start:offset+box_size]
-                # 尝试解析为H.264
+            if codec_info is None:
+                # 没有找到stsd时，依次尝试H.264和H.265
                 try:
                     sei_list.extend(self._parse_h264_nalus(mdat_data))
-                except:
+                except (IndexError, ValueError, struct.error):
                     pass
-                # 尝试解析为H.265
                 try:
-                    sei_list.extend(self._parse_h265_stream(mdat_data))
-                except:
+                    # 起始码搜索需要bytes.find，直接在原数据的mdat范围内搜索，不复制mdat
+                    sei_list.extend(self._parse_h265_stream(data, box_data_start, box_end))
+                except (IndexError, ValueError, struct.error):
                     pass
-            
-            offset += box_size
+            else:
+                codec, length_size = codec_info
+                if codec == 'H.265':
+                    sei_list.extend(self._parse_h265_nalus(mdat_data, length_size))
+                else:
+                    sei_list.extend(self._parse_h264_nalus(mdat_data, length_size))
         
         return sei_list
     
+    def _parse_stsd(self, data: bytes) -> Optional[Tuple[str, int]]:
+        """从moov/trak/mdia/minf/stbl/stsd中读取视频编码和NALU长度字段的字节数"""
+        stsd_path = [b'moov', b'trak', b'mdia', b'minf', b'stbl', b'stsd']
+        
+        for stsd_start, stsd_end in _find_boxes(data, stsd_path, 0, len(data)):
+            # 跳过version/flags和entry_count
+            for entry_type, entry_start, entry_end in _iter_boxes(data, stsd_start + 8, stsd_end):
+                if entry_type in (b'avc1', b'avc3'):
+                    # AVCDecoderConfigurationRecord: 第4字节低2位为lengthSizeMinusOne
+                    codec, config_type, length_pos = 'H.264', b'avcC', 4
+                elif entry_type in (b'hvc1', b'hev1'):
+                    # HEVCDecoderConfigurationRecord: 第21字节低2位为lengthSizeMinusOne
+                    codec, config_type, length_pos = 'H.265', b'hvcC', 21
+                else:
+                    continue
+                
+                # VisualSampleEntry固定字段共78字节，之后为子box
+                for box_type, box_data_start, box_end in _iter_boxes(data, entry_start + 78, entry_end):
+                    if box_type == config_type and box_data_start + length_pos < box_end:
+                        return codec, (data[box_data_start + length_pos] & 0x03) + 1
+        
+        return None
+    
     def _auto_detect_and_parse(self, data: bytes) -> List[Dict[str, Any]]:
         """自动检测文件格式并解析"""
         sei_list = []
@@ -369,12 +589,12 @@ class SEIParser:
         # 尝试不同的解析方法
         try:
             sei_list.extend(self._parse_h264_stream(data))
-        except:
+        except (IndexError, ValueError, struct.error):
             pass
         
         try:
             sei_list.extend(self._parse_h265_stream(data))
-        except:
+        except (IndexError, ValueError, struct.error):
             pass
         
         return sei_list
@@ -394,67 +614,66 @@ class SEIParser:
                 return sei_list
             payload_start = 1
         
-        offset = payload_start
+        # payload的type/size和内容都需要在去除防竞争字节后的RBSP上解析
+        nalu_data = _rbsp_unescape(nalu_data)
         
-        while offset < len(nalu_data):
-            # 解析SEI payload type
-            sei_type = 0
-            while offset < len(nalu_data) and nalu_data[offset] == 0xFF:
-                sei_type += 255
-                offset += 1
-            
-            if offset >= len(nalu_data):
-                break
-            
-            sei_type += nalu_data[offset]
-            offset += 1
-            
-            # 解析SEI payload size
-            sei_size = 0
-            while offset < len(nalu_data) and nalu_data[offset] == 0xFF:
-                sei_size += 255
-                offset += 1
-            
-            if offset >= len(nalu_data):
-                break
-            
-            sei_size += nalu_data[offset]
-            offset += 1
-            
-            # 读取SEI payload数据
-            if offset + sei_size > len(nalu_data):
-                sei_size = len(nalu_data) - offset
-            
+        for sei_type, sei_size, offset in _scan_sei(nalu_data, payload_start):
             sei_payload = nalu_data[offset:offset+sei_size]
             
-            sei_info = {
+            # payload_hex按需计算，见SEIInfo
+            sei_info = SEIInfo({
                 'sei_type': sei_type,
-                'sei_type_name': self.sei_types.get(sei_type, f'unknown_{sei_type}'),
+                'sei_type_name': _sei_type_name(sei_type),
                 'size': sei_size,
-                'payload_hex': sei_payload.hex(),
                 'payload_bytes': sei_payload,
                 'codec': 'H.265' if is_h265 else 'H.264'
-            }
+            })
             
-            # 尝试解析为字符串
-            try:
-                # 移除尾部的0x00字节
-                clean_payload = sei_payload.rstrip(b'\x00')
-                sei_info['payload_string'] = clean_payload.decode('utf-8', errors='ignore')
-                
-                # 尝试解析为JSON
-                try:
-                    sei_info['payload_json'] = json.loads(sei_info['payload_string'])
-                except:
-                    pass
-            except:
-                sei_info['payload_string'] = None
+            if not self.decode:
+                sei_list.append(sei_info)
+                continue
+            
+            payload_string, payload_json = self._decode_payload(sei_payload)
+            sei_info['payload_string'] = payload_string
+            if payload_json is not None:
+                sei_info['payload_json'] = payload_json
             
             sei_list.append(sei_info)
-            offset += sei_size
         
         return sei_list
     
+    def _decode_payload(self, payload: bytes) -> Tuple[Optional[str], Any]:
+        """将payload解码为字符串并尝试解析JSON，返回 (payload_string, payload_json)
+        
+        同样的payload在流中经常逐帧重复，字符串和"是否为JSON"的判断在本次解析内按payload缓存；
+        JSON对象每次重新解析，不在SEI之间共享。
+        """
+        cached = self._decode_cache.get(payload)
+        if cached is not None:
+            payload_string, is_json = cached
+        else:
+            # 尝试解析为字符串
+            try:
+                # 移除尾部的0x00字节
+                clean_payload = payload.rstrip(b'\x00')
+                payload_string = clean_payload.decode('utf-8', errors='ignore')
+                # 只有以{或[开头的payload才尝试解析为JSON
+                is_json = clean_payload.lstrip()[:1] in (b'{', b'[')
+            except UnicodeDecodeError:
+                payload_string, is_json = None, False
+        
+        payload_json = None
+        if is_json:
+            try:
+                payload_json = json.loads(payload_string)
+            except (json.JSONDecodeError, RecursionError):
+                is_json = False
+        
+        if cached is None and len(self._decode_cache) < _DECODE_CACHE_SIZE:
+            self._decode_cache[payload] = (payload_string, is_json)
+        
+        return payload_string, payload_json
+    
     def print_sei_info(self, sei_list: List[Dict[str, Any]]):
         """打印SEI信息"""
         if not sei_list:
@@ -471,7 +690,7 @@ class SEIParser:
             print(f"  数据大小: {sei['size']} 字节")
             print(f"  16进制数据: {sei['payload_hex']}")
             
-            if sei['payload_string']:
+            if sei.get('payload_string'):
                 print(f"  字符串内容: {repr(sei['payload_string'])}")
                 
                 if 'payload_json' in sei:
@@ -1,5 +1,7 @@
+import os
 import sys
 import json
+import struct
 
 # ANSI escape codes for colors
 class Colors:
@@ -11,13 +13,26 @@ class Colors:
     BLUE = '\x1b[94m'
     CYAN = '\x1b[96m'
 
+def format_pretty(message, color=Colors.RESET, bold=False):
+    """Formats a message line with specified color and boldness."""
+    style = Colors.BOLD if bold else ''
+    return f"{style}{color}{message}{Colors.RESET}\n"
+
 def print_pretty(message, color=Colors.RESET, bold=False):
     """Prints a message with specified color and boldness."""
-    style = Colors.BOLD if bold else ''
-    print(f"{style}{color}{message}{Colors.RESET}")
+    sys.stdout.write(format_pretty(message, color, bold))
+
+# FLV tag header: TagType, DataSize, Timestamp, TimestampExtended, StreamID
+FLV_TAG_HEADER = struct.Struct('>B3s3sB3s')
+
+# Fixed lines of the SEI message block, formatted once
+SEI_SEPARATOR = format_pretty("─" * 60, color=Colors.YELLOW)
+SEI_HEADER = format_pretty(f"  SEI Message Found", color=Colors.YELLOW, bold=True)
 
 def parse_sei_message(payload):
     """Parses one or more SEI messages from a SEI NALU payload."""
+    # Output is collected and written once per NALU instead of once per line
+    out = []
     offset = 0
     while offset < len(payload):
         if payload[offset] == 0x80: # Stop bit
@@ -42,7 +57,7 @@ def parse_sei_message(payload):
             offset += 1
         
         if offset + sei_size > len(payload):
-            print_pretty(f"Warning: Incomplete SEI message. Expected size {sei_size}, but not enough data.", color=Colors.RED)
+            out.append(format_pretty(f"Warning: Incomplete SEI message. Expected size {sei_size}, but not enough data.", color=Colors.RED))
             break
 
         # 3. Extract SEI Payload
@@ -50,32 +65,40 @@ def parse_sei_message(payload):
         offset += sei_size
 
         # 4. Print formatted output
-        print_pretty("─" * 60, color=Colors.YELLOW)
-        print_pretty(f"  SEI Message Found", color=Colors.YELLOW, bold=True)
+        out.append(SEI_SEPARATOR)
+        out.append(SEI_HEADER)
         type_str = " (User data unregistered)" if sei_type == 5 else ""
-        print_pretty(f"    ├─ SEI Type : {sei_type}{type_str}", color=Colors.CYAN)
-        print_pretty(f"    ├─ Size     : {sei_size}", color=Colors.CYAN)
+        out.append(format_pretty(f"    ├─ SEI Type : {sei_type}{type_str}", color=Colors.CYAN))
+        out.append(format_pretty(f"    ├─ Size     : {sei_size}", color=Colors.CYAN))
         
         try:
             # Clean up trailing null bytes and whitespace which are common in SEI payloads
             str_payload = sei_payload.decode('utf-8').rstrip('\x00').strip()
             
-            try:
-                # Attempt to parse the string as JSON
-                json_obj = json.loads(str_payload)
+            json_obj = None
+            if str_payload[:1] in ('{', '['):
+                # Only attempt JSON parsing when the payload looks like an object or array
+                try:
+                    json_obj = json.loads(str_payload)
+                except (json.JSONDecodeError, RecursionError):
+                    pass
+
+            if json_obj is not None:
                 # If successful, pretty-print the JSON
                 pretty_json = json.dumps(json_obj, indent=4)
-                print_pretty(f"    ├─ Payload (JSON) :\n{pretty_json}", color=Colors.GREEN)
-            except json.JSONDecodeError:
-                # If it fails, treat it as a regular string
-                print_pretty(f"    ├─ Payload (String) : {str_payload}", color=Colors.RESET)
+                out.append(format_pretty(f"    ├─ Payload (JSON) :\n{pretty_json}", color=Colors.GREEN))
+            else:
+                # Otherwise, treat it as a regular string
+                out.append(format_pretty(f"    ├─ Payload (String) : {str_payload}", color=Colors.RESET))
 
         except UnicodeDecodeError:
-            print_pretty(f"    ├─ Payload (String) : Not a valid UTF-8 string.", color=Colors.RED)
+            out.append(format_pretty(f"    ├─ Payload (String) : Not a valid UTF-8 string.", color=Colors.RED))
+
+        out.append(format_pretty(f"    └─ Payload (Hex)    : {sei_payload.hex()}", color=Colors.RESET))
+        out.append(SEI_SEPARATOR)
+        out.append("\n")
 
-        print_pretty(f"    └─ Payload (Hex)    : {sei_payload.hex()}", color=Colors.RESET)
-        print_pretty("─" * 60, color=Colors.YELLOW)
-        print()
+    sys.stdout.write("".join(out))
 
 def parse_flv(file_path):
     """Parses an FLV file to find and process SEI NALUs."""
@@ -95,14 +118,24 @@ def parse_flv(file_path):
                 if len(tag_header_data) < 11:
                     break
 
-                tag_type = tag_header_data[0]
-                data_size = int.from_bytes(tag_header_data[1:4], 'big')
+                tag_type, data_size, _, _, _ = FLV_TAG_HEADER.unpack(tag_header_data)
+                data_size = int.from_bytes(data_size, 'big')
+                
+                if tag_type != 9: # Skip non-video tags, seeking over them when possible
+                    if f.seekable():
+                        f.seek(data_size, os.SEEK_CUR)
+                    elif len(f.read(data_size)) < data_size:
+                        break
+                    if len(f.read(4)) < 4: # Skip PreviousTagSize; short read means truncated
+                        break
+                    tag_count += 1
+                    continue
                 
                 tag_data = f.read(data_size)
                 if len(tag_data) < data_size:
                     break
                 
-                if tag_type == 9 and len(tag_data) > 5: # Video Tag
+                if len(tag_data) > 5: # Video Tag
                     codec_id = tag_data[0] & 0x0F
                     packet_type = tag_data[1]
                     
@@ -5,14 +5,39 @@
 
 import struct
 import sys
+import os
 import json
+import mmap
+import stat
+
+
+_U32 = struct.Struct('>I').unpack_from
 
 
 def parse_flv_sei(filepath):
     """从FLV文件中快速提取SEI数据"""
     with open(filepath, 'rb') as f:
-        data = f.read()
-    
+        data = None
+        
+        # 普通文件用mmap按需映射，避免把整个文件读入内存；管道等输入退回到一次性读取
+        st = os.fstat(f.fileno())
+        if stat.S_ISREG(st.st_mode) and st.st_size > 0:
+            try:
+                data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except (OSError, ValueError):
+                pass
+        if data is None:
+            data = f.read()
+        
+        try:
+            _parse_flv_tags(data)
+        finally:
+            if isinstance(data, mmap.mmap):
+                data.close()
+
+
+def _parse_flv_tags(data):
+    """遍历FLV tag并提取SEI数据"""
     if data[:3] != b'FLV':
         print("错误: 不是有效的FLV文件")
         return
@@ -26,7 +51,7 @@ def parse_flv_sei(filepath):
         
         # 读取FLV tag
         tag_type = data[offset]
-        data_size = struct.unpack('>I', b'\x00' + data[offset+1:offset+4])[0]
+        data_size = int.from_bytes(data[offset+1:offset+4], 'big')
         
         if tag_type == 9 and offset + 11 + data_size <= len(data):  # 视频tag
             video_data = data[offset+11:offset+11+data_size]
@@ -45,7 +70,7 @@ def extract_sei_from_nalus(data, start_count):
     offset = 0
     
     while offset + 4 < len(data):
-        nalu_length = struct.unpack('>I', data[offset:offset+4])[0]
+        nalu_length = _U32(data, offset)[0]
         offset += 4
         
         if offset + nalu_length > len(data):
@@ -108,14 +133,15 @@ def parse_sei_nalu(nalu_data, sei_number):
             text = clean_payload.decode('utf-8', errors='ignore')
             print(f"字符串: {repr(text)}")
             
-            # 尝试解析JSON
-            try:
-                json_data = json.loads(text)
-                print("JSON内容:")
-                print(json.dumps(json_data, indent=2, ensure_ascii=False))
-            except:
-                pass
-        except:
+            # 只有以{或[开头的payload才尝试解析JSON
+            if clean_payload.lstrip()[:1] in (b'{', b'['):
+                try:
+                    json_data = json.loads(text)
+                    print("JSON内容:")
+                    print(json.dumps(json_data, indent=2, ensure_ascii=False))
+                except (json.JSONDecodeError, RecursionError):
+                    pass
+        except UnicodeDecodeError:
             print("字符串: (无法解码)")
         
         print("-" * 50)